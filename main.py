@@ -1,43 +1,89 @@
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from datetime import datetime
+from typing import Optional
 import logging
-from src.database.database import get_db_session, create_tables
+import orjson
+from src.config import ANALYSIS_WRITE_BEHIND, CORS_ORIGINS
+from src.database.database import get_db_session, create_tables, init_raw_pool, close_database
 from src.models.analysis import AnalysisRequest, AnalysisResponse
 from src.services.analysis_service import AnalysisService
 from src.crew.orchestrator import CrewOrchestrator
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+async def _create_tables():
+    try:
+        await create_tables()
+        logger.info("Database tables created successfully")
+    except Exception as e:
+        logger.error(f"Failed to create database tables: {e}")
+        raise
+
+
+async def _create_raw_pool():
+    try:
+        await init_raw_pool()
+    except Exception as e:
+        logger.error(f"Failed to create raw connection pool: {e}")
+        raise
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize database and connection pool on startup, release them on shutdown"""
+    startup = [_create_tables()]
+    # The write-behind buffer flushes over raw connections from the start;
+    # otherwise the pool is only created on first use
+    if ANALYSIS_WRITE_BEHIND:
+        startup.append(_create_raw_pool())
+
+    # Independent startup round trips, run concurrently
+    await asyncio.gather(*startup)
+
+    # Build the cached OpenAPI schema now rather than on the first docs request
+    app.openapi()
+
+    if crew_orchestrator.history_writer is not None:
+        crew_orchestrator.history_writer.start()
+
+    yield
+
+    if crew_orchestrator.history_writer is not None:
+        await crew_orchestrator.history_writer.stop()
+    await close_database()
+
+
 app = FastAPI(
     title="Code Analysis Agent API",
     description="Agent for Python code analysis and optimization suggestions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# CORS middleware, only when cross-origin clients are configured
+if CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        # Browsers reject credentialed responses for a wildcard origin
+        allow_credentials="*" not in CORS_ORIGINS,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 # Initialize services
 analysis_service = AnalysisService()
 crew_orchestrator = CrewOrchestrator()
 
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database and services on startup"""
-    try:
-        await create_tables()
-        logger.info("Database tables created successfully")
-    except Exception as e:
-        logger.error(f"Failed to create database tables: {e}")
-        raise
+# Static configuration summary, serialized once instead of on every request
+_CONFIG_INFO_BODY = orjson.dumps(crew_orchestrator.get_configuration_info())
+_CONFIG_INFO_HEADERS = {"Cache-Control": "public, max-age=3600"}
 
 
 @app.get("/health")
@@ -74,26 +120,109 @@ async def analyze_code(
         raise HTTPException(status_code=500, detail="Internal server error during analysis")
 
 
+@app.post("/analyze-code/async", status_code=202)
+async def submit_code_analysis(request: AnalysisRequest):
+    """
+    Queue Python code for analysis and return a task ID to poll
+    """
+    if not request.code_snippet.strip():
+        raise HTTPException(status_code=400, detail="Code snippet cannot be empty")
+
+    task_id = crew_orchestrator.submit_analysis(request.code_snippet)
+    return {"task_id": task_id, "status": "queued"}
+
+
+@app.get("/analysis-tasks/{task_id}")
+async def get_analysis_task(task_id: str):
+    """
+    Get the status and result of a queued analysis
+    """
+    job = crew_orchestrator.get_analysis_job(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis task not found")
+
+    return job
+
+
 @app.get("/analysis-history")
 async def get_analysis_history(
         limit: int = 10,
-        offset: int = 0,
+        offset: int = Query(0, deprecated=True),
+        cursor_created_at: Optional[datetime] = None,
+        cursor_id: Optional[int] = None,
         db_session=Depends(get_db_session)
 ):
     """
     Get analysis history with pagination
+    
+    Pass the `next_cursor` values from a previous page as `cursor_created_at`
+    and `cursor_id` to fetch the following page; `offset` is kept for
+    backward compatibility only.
     """
+    if (cursor_created_at is None) != (cursor_id is None):
+        raise HTTPException(
+            status_code=422,
+            detail="cursor_created_at and cursor_id must be given together"
+        )
+
     try:
         history = await analysis_service.get_analysis_history(
-            db_session, limit=limit, offset=offset
+            db_session,
+            limit=limit,
+            offset=offset,
+            cursor_created_at=cursor_created_at,
+            cursor_id=cursor_id
         )
-        return {"history": history}
+
+        next_cursor = None
+        if history and len(history) == limit:
+            last = history[-1]
+            next_cursor = {"created_at": last.created_at.isoformat(), "id": last.id}
+
+        # orjson encodes the datetimes natively, so skip FastAPI's
+        # jsonable_encoder pass over every history item
+        return ORJSONResponse({
+            "history": [item.dict() for item in history],
+            "next_cursor": next_cursor
+        })
 
     except Exception as e:
         logger.error(f"Error fetching analysis history: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/analysis-history/{analysis_id}")
+async def get_analysis_detail(
+        analysis_id: int,
+        db_session=Depends(get_db_session)
+):
+    """
+    Get a single analysis with its full suggestions
+    """
+    try:
+        analysis = await analysis_service.get_analysis_by_id(
+            db_session, analysis_id, decode_suggestions=False
+        )
+
+    except Exception as e:
+        logger.error(f"Error fetching analysis {analysis_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    # The stored suggestions are already JSON, so splice them into the body
+    # instead of decoding and re-encoding them
+    suggestions_json = analysis.pop("suggestions")
+    body = (
+        orjson.dumps(analysis)[:-1]
+        + b',"suggestions":'
+        + suggestions_json.encode()
+        + b"}"
+    )
+    return Response(content=body, media_type="application/json")
+
+
 @app.get("/agent-status")
 async def get_agent_status():
     """
@@ -113,13 +242,11 @@ async def get_config_info():
     """
     Get information about loaded YAML configurations
     """
-    try:
-        config_info = crew_orchestrator.get_configuration_info()
-        return config_info
-
-    except Exception as e:
-        logger.error(f"Error getting config info: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
+    return Response(
+        content=_CONFIG_INFO_BODY,
+        media_type="application/json",
+        headers=_CONFIG_INFO_HEADERS
+    )
 
 
 if __name__ == "__main__":
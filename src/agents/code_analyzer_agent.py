@@ -1,11 +1,15 @@
 import ast
+import asyncio
+import copy
+import hashlib
 import re
 import time
-from typing import List, Dict, Any, Optional
+from collections import Counter, OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, TypedDict
 import logging
 
+from src.config import ANALYSIS_CACHE_SIZE
 from src.models.analysis import (
-    CodeSuggestion, 
     SeverityLevel, 
     SuggestionCategory,
     AnalysisMetrics,
@@ -13,11 +17,201 @@ from src.models.analysis import (
 
 logger = logging.getLogger(__name__)
 
+# Static capability list reported by get_agent_info
+AGENT_CAPABILITIES = (
+    "Syntax analysis",
+    "Import optimization",
+    "Naming convention checks",
+    "Complexity analysis",
+    "Performance suggestions",
+    "Security vulnerability detection",
+    "Best practices enforcement"
+)
+
+
+class SuggestionDict(TypedDict):
+    """
+    Internal form of a CodeSuggestion, with the same fields
+    
+    Rules build plain dicts; they are validated as CodeSuggestion only once,
+    at the API response boundary.
+    """
+    line_number: Optional[int]
+    category: SuggestionCategory
+    severity: SeverityLevel
+    message: str
+    suggested_fix: Optional[str]
+    rule_name: str
+
+
+class _CodeCollector:
+    """
+    Collects, in a single traversal, the nodes the analysis rules inspect
+    
+    The tree is walked depth-first with an explicit stack, so deeply nested
+    expressions (long operator chains) cannot exhaust the recursion limit.
+    Nodes that need work once their subtree is done push an exit marker
+    before their children.
+    
+    Cyclomatic complexity is accumulated on the way down: each function gets
+    a counter on the stack, decision points increment the innermost one, and
+    a finished function's count is folded into its enclosing function, since
+    a function's complexity also covers the functions nested inside it.
+    """
+    
+    def __init__(self):
+        self.imports: List[Tuple[str, int]] = []
+        # Functions and classes, in traversal order
+        self.definitions: List[ast.AST] = []
+        self.function_complexities: List[Tuple[ast.FunctionDef, int]] = []
+        # `+=` statements inside for loops, and global statements
+        self.performance_nodes: List[ast.AST] = []
+        self._complexity_stack: List[int] = []
+        self._function_indexes: List[int] = []
+        self._for_depth = 0
+    
+    def visit(self, tree: ast.AST) -> None:
+        stack: List[Any] = [tree]
+        pop = stack.pop
+        push = stack.append
+        extend = stack.extend
+        iter_child_nodes = ast.iter_child_nodes
+        
+        while stack:
+            node = pop()
+            
+            # Exit marker: the node's whole subtree has been visited
+            if type(node) is tuple:
+                leave, node = node
+                leave(self, node)
+                continue
+            
+            node_type = type(node)
+            handler = _COLLECTOR_HANDLERS.get(node_type)
+            if handler is not None:
+                handler(self, node)
+            
+            leave = _COLLECTOR_EXIT_HANDLERS.get(node_type)
+            if leave is not None:
+                push((leave, node))
+            
+            # Reversed, so children are popped in source order
+            extend(reversed(list(iter_child_nodes(node))))
+    
+    def _add_decisions(self, count: int) -> None:
+        if self._complexity_stack:
+            self._complexity_stack[-1] += count
+    
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports.append((alias.name, node.lineno))
+    
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.module:
+            self.imports.append((node.module, node.lineno))
+    
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self.definitions.append(node)
+        self._function_indexes.append(len(self.function_complexities))
+        self.function_complexities.append((node, 1))
+        self._complexity_stack.append(1)  # Base complexity
+    
+    def leave_FunctionDef(self, node: ast.FunctionDef) -> None:
+        complexity = self._complexity_stack.pop()
+        self.function_complexities[self._function_indexes.pop()] = (node, complexity)
+        self._add_decisions(complexity - 1)
+    
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.definitions.append(node)
+    
+    def visit_If(self, node: ast.If) -> None:
+        self._add_decisions(1)
+    
+    def visit_While(self, node: ast.While) -> None:
+        self._add_decisions(1)
+    
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        self._add_decisions(1)
+    
+    def visit_BoolOp(self, node: ast.BoolOp) -> None:
+        self._add_decisions(len(node.values) - 1)
+    
+    def visit_For(self, node: ast.For) -> None:
+        self._add_decisions(1)
+        self._for_depth += 1
+    
+    def leave_For(self, node: ast.For) -> None:
+        self._for_depth -= 1
+    
+    def visit_AugAssign(self, node: ast.AugAssign) -> None:
+        if self._for_depth and isinstance(node.op, ast.Add):
+            self.performance_nodes.append(node)
+    
+    def visit_Global(self, node: ast.Global) -> None:
+        self.performance_nodes.append(node)
+
+
+# Collector handlers keyed by exact node type, built once for every run and
+# looked up with a single dict access per node
+_COLLECTOR_HANDLERS = {
+    ast.Import: _CodeCollector.visit_Import,
+    ast.ImportFrom: _CodeCollector.visit_ImportFrom,
+    ast.FunctionDef: _CodeCollector.visit_FunctionDef,
+    ast.ClassDef: _CodeCollector.visit_ClassDef,
+    ast.If: _CodeCollector.visit_If,
+    ast.While: _CodeCollector.visit_While,
+    ast.ExceptHandler: _CodeCollector.visit_ExceptHandler,
+    ast.BoolOp: _CodeCollector.visit_BoolOp,
+    ast.For: _CodeCollector.visit_For,
+    ast.AugAssign: _CodeCollector.visit_AugAssign,
+    ast.Global: _CodeCollector.visit_Global
+}
+
+# Handlers run after a node's subtree has been visited
+_COLLECTOR_EXIT_HANDLERS = {
+    ast.FunctionDef: _CodeCollector.leave_FunctionDef,
+    ast.For: _CodeCollector.leave_For
+}
+
+
+# Naming patterns, compiled once instead of on every checked name
+_SNAKE_CASE = re.compile(r'^[a-z_][a-z0-9_]*$')
+_PASCAL_CASE = re.compile(r'^[A-Z][a-zA-Z0-9]*$')
+
+# Characters after which an uppercase letter always starts a new snake_case word
+_LOWER_OR_DIGIT = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
+
+# A line over 88 characters (PEP 8 recommends 79, but 88 is acceptable)
+_LONG_LINE = re.compile(r'^.{89,}$', re.MULTILINE)
+
+# Analysis results keyed by a digest of the code snippet, shared by all agents
+_RESULT_CACHE: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+# Analyses currently running, so concurrent identical snippets share one run
+_PENDING_ANALYSES: "Dict[bytes, asyncio.Future]" = {}
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy a cached analysis result for a caller
+    
+    Suggestions are flat dicts of immutable values, so copying each dict is
+    as safe as a deepcopy without its per-object memo bookkeeping.
+    """
+    return {
+        **result,
+        "suggestions": [dict(suggestion) for suggestion in result["suggestions"]],
+        "metrics": copy.copy(result["metrics"])
+    }
+
+
 class CodeAnalyzerAgent:
     """
     Agent responsible for analyzing Python code and providing optimization suggestions
     """
     
+    # config is assigned by the orchestrator after construction
+    __slots__ = ("version", "name", "description", "config")
+    
     def __init__(self):
         self.version = "1.0.0"
         self.name = "CodeAnalyzer"
@@ -26,6 +220,48 @@ class CodeAnalyzerAgent:
     async def analyze_code(self, code_snippet: str) -> Dict[str, Any]:
         """
         Main method to analyze Python code and return suggestions
+        
+        The AST analysis is CPU-bound, so it runs in a worker thread to keep
+        the event loop free for other requests. Results are cached by snippet
+        content, so resubmitting identical code skips the analysis entirely,
+        including while the first submission is still being analyzed.
+        """
+        start_time = time.time()
+        cache_key = hashlib.blake2b(code_snippet.encode(), digest_size=16).digest()
+        
+        cached = _RESULT_CACHE.get(cache_key)
+        if cached is not None:
+            _RESULT_CACHE.move_to_end(cache_key)
+            # Callers enrich the suggestions in place, so hand out a copy
+            result = _copy_result(cached)
+            # Report the time this request took, not the original analysis
+            result["processing_time_ms"] = int((time.time() - start_time) * 1000)
+            return result
+        
+        pending = _PENDING_ANALYSES.get(cache_key)
+        if pending is not None:
+            result = _copy_result(await asyncio.shield(pending))
+            result["processing_time_ms"] = int((time.time() - start_time) * 1000)
+            return result
+        
+        pending = asyncio.ensure_future(asyncio.to_thread(self._run_analysis, code_snippet))
+        _PENDING_ANALYSES[cache_key] = pending
+        try:
+            result = await asyncio.shield(pending)
+        finally:
+            del _PENDING_ANALYSES[cache_key]
+        
+        # The cached result is shared with the callers waiting on it above and
+        # is never handed out itself
+        _RESULT_CACHE[cache_key] = result
+        if len(_RESULT_CACHE) > ANALYSIS_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)
+        
+        return _copy_result(result)
+    
+    def _run_analysis(self, code_snippet: str) -> Dict[str, Any]:
+        """
+        Synchronously analyze Python code and return suggestions
         """
         start_time = time.time()
         
@@ -48,29 +284,35 @@ class CodeAnalyzerAgent:
                     "summary": "Code contains syntax errors that must be fixed."
                 }
             
+            # Walk the tree once; every rule below works from what was collected,
+            # including the function complexities shared with the metrics
+            collector = _CodeCollector()
+            collector.visit(tree)
+            function_complexities = collector.function_complexities
+            
             # Perform various analyses
             suggestions = []
             
             # 1. Import analysis
-            suggestions.extend(self._analyze_imports(tree, code_snippet))
+            suggestions.extend(self._analyze_imports(collector.imports, code_snippet))
             
             # 2. Naming conventions
-            suggestions.extend(self._analyze_naming_conventions(tree))
+            suggestions.extend(self._analyze_naming_conventions(collector.definitions))
             
             # 3. Code complexity
-            suggestions.extend(self._analyze_complexity(tree))
+            suggestions.extend(self._analyze_complexity(function_complexities))
             
             # 4. Performance issues
-            suggestions.extend(self._analyze_performance(tree, code_snippet))
+            suggestions.extend(self._analyze_performance(collector.performance_nodes))
             
             # 5. Security issues
             suggestions.extend(self._analyze_security(tree, code_snippet))
             
             # 6. Best practices
-            suggestions.extend(self._analyze_best_practices(tree, code_snippet))
+            suggestions.extend(self._analyze_best_practices(collector.definitions, code_snippet))
             
             # Calculate metrics
-            metrics = self._calculate_metrics(tree, code_snippet)
+            metrics = self._calculate_metrics(code_snippet, function_complexities)
             
             # Generate summary
             summary = self._generate_summary(suggestions, metrics)
@@ -78,7 +320,7 @@ class CodeAnalyzerAgent:
             processing_time = int((time.time() - start_time) * 1000)
             
             return {
-                "suggestions": [suggestion.dict() for suggestion in suggestions],
+                "suggestions": suggestions,
                 "metrics": metrics.dict(),
                 "processing_time_ms": processing_time,
                 "summary": summary
@@ -100,29 +342,24 @@ class CodeAnalyzerAgent:
                 "summary": "Code analysis encountered errors."
             }
     
-    def _analyze_imports(self, tree: ast.AST, code: str) -> List[CodeSuggestion]:
+    def _analyze_imports(self, imports_found: List[Tuple[str, int]], code: str) -> List[SuggestionDict]:
         """Analyze import statements"""
         suggestions = []
-        imports_found = []
         
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    imports_found.append((alias.name, node.lineno))
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    imports_found.append((node.module, node.lineno))
+        # Nothing to check, so skip rebuilding the code without its imports
+        if not imports_found:
+            return suggestions
         
         # Check for unused imports (basic check)
         code_without_imports = '\n'.join([
-            line for line in code.split('\n') 
-            if not line.strip().startswith('import') and not line.strip().startswith('from')
+            line for line in code.split('\n')
+            if not line.lstrip().startswith(('import', 'from'))
         ])
         
         for import_name, line_no in imports_found:
             base_name = import_name.split('.')[0]
             if base_name not in code_without_imports:
-                suggestions.append(CodeSuggestion(
+                suggestions.append(SuggestionDict(
                     line_number=line_no,
                     category=SuggestionCategory.IMPORTS,
                     severity=SeverityLevel.LOW,
@@ -133,14 +370,14 @@ class CodeAnalyzerAgent:
         
         return suggestions
     
-    def _analyze_naming_conventions(self, tree: ast.AST) -> List[CodeSuggestion]:
+    def _analyze_naming_conventions(self, definitions: List[ast.AST]) -> List[SuggestionDict]:
         """Analyze naming conventions"""
         suggestions = []
         
-        for node in ast.walk(tree):
+        for node in definitions:
             if isinstance(node, ast.FunctionDef):
-                if not re.match(r'^[a-z_][a-z0-9_]*$', node.name):
-                    suggestions.append(CodeSuggestion(
+                if not _SNAKE_CASE.match(node.name):
+                    suggestions.append(SuggestionDict(
                         line_number=node.lineno,
                         category=SuggestionCategory.NAMING,
                         severity=SeverityLevel.MEDIUM,
@@ -150,8 +387,8 @@ class CodeAnalyzerAgent:
                     ))
             
             elif isinstance(node, ast.ClassDef):
-                if not re.match(r'^[A-Z][a-zA-Z0-9]*$', node.name):
-                    suggestions.append(CodeSuggestion(
+                if not _PASCAL_CASE.match(node.name):
+                    suggestions.append(SuggestionDict(
                         line_number=node.lineno,
                         category=SuggestionCategory.NAMING,
                         severity=SeverityLevel.MEDIUM,
@@ -162,58 +399,55 @@ class CodeAnalyzerAgent:
         
         return suggestions
     
-    def _analyze_complexity(self, tree: ast.AST) -> List[CodeSuggestion]:
+    def _analyze_complexity(
+        self, function_complexities: List[Tuple[ast.FunctionDef, int]]
+    ) -> List[SuggestionDict]:
         """Analyze code complexity"""
         suggestions = []
         
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                complexity = self._calculate_cyclomatic_complexity(node)
-                if complexity > 10:
-                    suggestions.append(CodeSuggestion(
-                        line_number=node.lineno,
-                        category=SuggestionCategory.COMPLEXITY,
-                        severity=SeverityLevel.HIGH if complexity > 15 else SeverityLevel.MEDIUM,
-                        message=f"Function '{node.name}' has high cyclomatic complexity ({complexity})",
-                        suggested_fix="Consider breaking this function into smaller functions",
-                        rule_name="high_complexity"
-                    ))
-                
-                # Check for too many parameters
-                if len(node.args.args) > 5:
-                    suggestions.append(CodeSuggestion(
-                        line_number=node.lineno,
-                        category=SuggestionCategory.MAINTAINABILITY,
-                        severity=SeverityLevel.MEDIUM,
-                        message=f"Function '{node.name}' has too many parameters ({len(node.args.args)})",
-                        suggested_fix="Consider using a configuration object or reducing parameters",
-                        rule_name="too_many_parameters"
-                    ))
+        for node, complexity in function_complexities:
+            if complexity > 10:
+                suggestions.append(SuggestionDict(
+                    line_number=node.lineno,
+                    category=SuggestionCategory.COMPLEXITY,
+                    severity=SeverityLevel.HIGH if complexity > 15 else SeverityLevel.MEDIUM,
+                    message=f"Function '{node.name}' has high cyclomatic complexity ({complexity})",
+                    suggested_fix="Consider breaking this function into smaller functions",
+                    rule_name="high_complexity"
+                ))
+            
+            # Check for too many parameters
+            if len(node.args.args) > 5:
+                suggestions.append(SuggestionDict(
+                    line_number=node.lineno,
+                    category=SuggestionCategory.MAINTAINABILITY,
+                    severity=SeverityLevel.MEDIUM,
+                    message=f"Function '{node.name}' has too many parameters ({len(node.args.args)})",
+                    suggested_fix="Consider using a configuration object or reducing parameters",
+                    rule_name="too_many_parameters"
+                ))
         
         return suggestions
     
-    def _analyze_performance(self, tree: ast.AST, code: str) -> List[CodeSuggestion]:
+    def _analyze_performance(self, performance_nodes: List[ast.AST]) -> List[SuggestionDict]:
         """Analyze performance issues"""
         suggestions = []
         
-        for node in ast.walk(tree):
-            # Check for inefficient loops
-            if isinstance(node, ast.For):
-                # Check for list concatenation in loops
-                for child in ast.walk(node):
-                    if isinstance(child, ast.AugAssign) and isinstance(child.op, ast.Add):
-                        suggestions.append(CodeSuggestion(
-                            line_number=node.lineno,
-                            category=SuggestionCategory.PERFORMANCE,
-                            severity=SeverityLevel.MEDIUM,
-                            message="Avoid list concatenation in loops",
-                            suggested_fix="Use list.extend() or list comprehension instead",
-                            rule_name="inefficient_loop_concatenation"
-                        ))
+        for node in performance_nodes:
+            # Check for list concatenation in loops
+            if isinstance(node, ast.AugAssign):
+                suggestions.append(SuggestionDict(
+                    line_number=node.lineno,
+                    category=SuggestionCategory.PERFORMANCE,
+                    severity=SeverityLevel.MEDIUM,
+                    message="Avoid list concatenation in loops",
+                    suggested_fix="Use list.extend() or list comprehension instead",
+                    rule_name="inefficient_loop_concatenation"
+                ))
             
             # Check for global variable usage
-            if isinstance(node, ast.Global):
-                suggestions.append(CodeSuggestion(
+            elif isinstance(node, ast.Global):
+                suggestions.append(SuggestionDict(
                     line_number=node.lineno,
                     category=SuggestionCategory.PERFORMANCE,
                     severity=SeverityLevel.LOW,
@@ -224,13 +458,13 @@ class CodeAnalyzerAgent:
         
         return suggestions
     
-    def _analyze_security(self, tree: ast.AST, code: str) -> List[CodeSuggestion]:
+    def _analyze_security(self, tree: ast.AST, code: str) -> List[SuggestionDict]:
         """Analyze security issues"""
         suggestions = []
         
         # Check for eval() usage
         if 'eval(' in code:
-            suggestions.append(CodeSuggestion(
+            suggestions.append(SuggestionDict(
                 line_number=None,
                 category=SuggestionCategory.SECURITY,
                 severity=SeverityLevel.CRITICAL,
@@ -241,7 +475,7 @@ class CodeAnalyzerAgent:
         
         # Check for exec() usage
         if 'exec(' in code:
-            suggestions.append(CodeSuggestion(
+            suggestions.append(SuggestionDict(
                 line_number=None,
                 category=SuggestionCategory.SECURITY,
                 severity=SeverityLevel.CRITICAL,
@@ -252,47 +486,51 @@ class CodeAnalyzerAgent:
         
         return suggestions
     
-    def _analyze_best_practices(self, tree: ast.AST, code: str) -> List[CodeSuggestion]:
+    def _analyze_best_practices(self, definitions: List[ast.AST], code: str) -> List[SuggestionDict]:
         """Analyze best practices"""
         suggestions = []
-        lines = code.split('\n')
-        
-        # Check for long lines
-        for i, line in enumerate(lines, 1):
-            if len(line) > 88:  # PEP 8 recommends 79, but 88 is acceptable
-                suggestions.append(CodeSuggestion(
-                    line_number=i,
-                    category=SuggestionCategory.READABILITY,
-                    severity=SeverityLevel.LOW,
-                    message=f"Line too long ({len(line)} characters)",
-                    suggested_fix="Break long lines using parentheses or line continuation",
-                    rule_name="line_too_long"
-                ))
+        
+        # Check for long lines, scanning the whole code in one regex pass
+        line_number = 1
+        position = 0
+        for match in _LONG_LINE.finditer(code):
+            line_number += code.count('\n', position, match.start())
+            position = match.start()
+            suggestions.append(SuggestionDict(
+                line_number=line_number,
+                category=SuggestionCategory.READABILITY,
+                severity=SeverityLevel.LOW,
+                message=f"Line too long ({match.end() - match.start()} characters)",
+                suggested_fix="Break long lines using parentheses or line continuation",
+                rule_name="line_too_long"
+            ))
         
         # Check for missing docstrings
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-                if not ast.get_docstring(node):
-                    suggestions.append(CodeSuggestion(
-                        line_number=node.lineno,
-                        category=SuggestionCategory.MAINTAINABILITY,
-                        severity=SeverityLevel.LOW,
-                        message=f"{node.__class__.__name__.lower().replace('def', '')} '{node.name}' missing docstring",
-                        suggested_fix="Add a descriptive docstring",
-                        rule_name="missing_docstring"
-                    ))
+        for node in definitions:
+            if not ast.get_docstring(node):
+                suggestions.append(SuggestionDict(
+                    line_number=node.lineno,
+                    category=SuggestionCategory.MAINTAINABILITY,
+                    severity=SeverityLevel.LOW,
+                    message=f"{node.__class__.__name__.lower().replace('def', '')} '{node.name}' missing docstring",
+                    suggested_fix="Add a descriptive docstring",
+                    rule_name="missing_docstring"
+                ))
         
         return suggestions
     
-    def _calculate_metrics(self, tree: ast.AST, code: str) -> AnalysisMetrics:
+    def _calculate_metrics(
+        self, code: str, function_complexities: List[Tuple[ast.FunctionDef, int]]
+    ) -> AnalysisMetrics:
         """Calculate code metrics"""
-        lines = [line for line in code.split('\n') if line.strip()]
+        lines_of_code = len([line for line in code.split('\n') if line.strip()])
+        overall_complexity = self._calculate_overall_complexity(function_complexities)
         
         return AnalysisMetrics(
-            lines_of_code=len(lines),
-            cyclomatic_complexity=self._calculate_overall_complexity(tree),
-            maintainability_index=self._calculate_maintainability_index(tree, code),
-            code_coverage_estimate=self._estimate_testability(tree)
+            lines_of_code=lines_of_code,
+            cyclomatic_complexity=overall_complexity,
+            maintainability_index=self._calculate_maintainability_index(lines_of_code, overall_complexity),
+            code_coverage_estimate=self._estimate_testability(function_complexities)
         )
     
     def _calculate_basic_metrics(self, code: str) -> AnalysisMetrics:
@@ -306,35 +544,15 @@ class CodeAnalyzerAgent:
             code_coverage_estimate=None
         )
     
-    def _calculate_cyclomatic_complexity(self, node: ast.AST) -> int:
-        """Calculate cyclomatic complexity for a function"""
-        complexity = 1  # Base complexity
-        
-        for child in ast.walk(node):
-            if isinstance(child, (ast.If, ast.While, ast.For, ast.ExceptHandler)):
-                complexity += 1
-            elif isinstance(child, ast.BoolOp):
-                complexity += len(child.values) - 1
-        
-        return complexity
-    
-    def _calculate_overall_complexity(self, tree: ast.AST) -> int:
+    def _calculate_overall_complexity(self, function_complexities: List[Tuple[ast.FunctionDef, int]]) -> int:
         """Calculate overall complexity of the code"""
-        total_complexity = 0
-        function_count = 0
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                total_complexity += self._calculate_cyclomatic_complexity(node)
-                function_count += 1
+        function_count = len(function_complexities)
+        total_complexity = sum(complexity for _, complexity in function_complexities)
         
         return total_complexity if function_count == 0 else total_complexity // function_count
     
-    def _calculate_maintainability_index(self, tree: ast.AST, code: str) -> float:
+    def _calculate_maintainability_index(self, lines: int, complexity: int) -> float:
         """Calculate a simple maintainability index"""
-        lines = len([line for line in code.split('\n') if line.strip()])
-        complexity = self._calculate_overall_complexity(tree)
-        
         if lines == 0:
             return 100.0
         
@@ -342,16 +560,10 @@ class CodeAnalyzerAgent:
         mi = max(0, 100 - (complexity * 2) - (lines * 0.1))
         return round(mi, 2)
     
-    def _estimate_testability(self, tree: ast.AST) -> float:
+    def _estimate_testability(self, function_complexities: List[Tuple[ast.FunctionDef, int]]) -> float:
         """Estimate how testable the code is"""
-        function_count = 0
-        complex_functions = 0
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                function_count += 1
-                if self._calculate_cyclomatic_complexity(node) > 5:
-                    complex_functions += 1
+        function_count = len(function_complexities)
+        complex_functions = sum(1 for _, complexity in function_complexities if complexity > 5)
         
         if function_count == 0:
             return 50.0
@@ -359,13 +571,14 @@ class CodeAnalyzerAgent:
         testability = 100 - ((complex_functions / function_count) * 50)
         return round(testability, 2)
     
-    def _generate_summary(self, suggestions: List[CodeSuggestion], metrics: AnalysisMetrics) -> str:
+    def _generate_summary(self, suggestions: List[SuggestionDict], metrics: AnalysisMetrics) -> str:
         """Generate a summary of the analysis"""
         if not suggestions:
             return "Code looks good! No major issues found."
         
-        critical_count = sum(1 for s in suggestions if s.severity == SeverityLevel.CRITICAL)
-        high_count = sum(1 for s in suggestions if s.severity == SeverityLevel.HIGH)
+        severity_counts = Counter(s["severity"] for s in suggestions)
+        critical_count = severity_counts[SeverityLevel.CRITICAL]
+        high_count = severity_counts[SeverityLevel.HIGH]
         
         if critical_count > 0:
             return f"Found {critical_count} critical issue(s) and {len(suggestions)} total suggestions. Immediate attention required."
@@ -376,8 +589,17 @@ class CodeAnalyzerAgent:
     
     def _to_snake_case(self, name: str) -> str:
         """Convert a name to snake_case"""
-        s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
-        return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
+        # An uppercase letter starts a word after a lowercase letter or digit,
+        # or when it begins a capitalized word: "getHTTPResponse" -> "get_http_response"
+        chars = []
+        last = len(name) - 1
+        for i, char in enumerate(name):
+            if i and 'A' <= char <= 'Z' and (
+                name[i - 1] in _LOWER_OR_DIGIT or (i < last and 'a' <= name[i + 1] <= 'z')
+            ):
+                chars.append('_')
+            chars.append(char)
+        return ''.join(chars).lower()
     
     async def get_agent_info(self) -> Dict[str, Any]:
         """Get information about this agent"""
@@ -385,13 +607,5 @@ class CodeAnalyzerAgent:
             "name": self.name,
             "version": self.version,
             "description": self.description,
-            "capabilities": [
-                "Syntax analysis",
-                "Import optimization", 
-                "Naming convention checks",
-                "Complexity analysis",
-                "Performance suggestions",
-                "Security vulnerability detection",
-                "Best practices enforcement"
-            ]
+            "capabilities": AGENT_CAPABILITIES
         }
\ No newline at end of file
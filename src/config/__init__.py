@@ -25,10 +25,23 @@ DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 MAX_CODE_LENGTH = int(os.getenv("MAX_CODE_LENGTH", "10000"))
 ANALYSIS_TIMEOUT = int(os.getenv("ANALYSIS_TIMEOUT_SECONDS", "30"))
 MAX_SUGGESTIONS = int(os.getenv("MAX_SUGGESTIONS", "50"))
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+
+# Write-behind history saves: analyses are queued and flushed in batches,
+# so /analyze-code responses carry no analysis_id while this is enabled
+ANALYSIS_WRITE_BEHIND = os.getenv("ANALYSIS_WRITE_BEHIND", "False").lower() == "true"
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "100"))
+
+# Finished background analysis jobs kept for polling, by count and by age
+ANALYSIS_JOB_LIMIT = int(os.getenv("ANALYSIS_JOB_LIMIT", "1000"))
+ANALYSIS_JOB_TTL_SECONDS = int(os.getenv("ANALYSIS_JOB_TTL_SECONDS", "3600"))
 
 # Security settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "localhost,127.0.0.1").split(",")
+# Comma-separated browser origins allowed to call the API; empty disables CORS
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
 
 # CrewAI settings
 CREW_MEMORY_ENABLED = os.getenv("CREW_MEMORY_ENABLED", "True").lower() == "true"
@@ -46,8 +59,15 @@ __all__ = [
     "MAX_CODE_LENGTH",
     "ANALYSIS_TIMEOUT",
     "MAX_SUGGESTIONS",
+    "ANALYSIS_CACHE_SIZE",
+    "ANALYSIS_WRITE_BEHIND",
+    "WRITE_BEHIND_BATCH_SIZE",
+    "WRITE_BEHIND_FLUSH_MS",
+    "ANALYSIS_JOB_LIMIT",
+    "ANALYSIS_JOB_TTL_SECONDS",
     "SECRET_KEY",
     "ALLOWED_HOSTS",
+    "CORS_ORIGINS",
     "CREW_MEMORY_ENABLED",
     "CREW_VERBOSE"
 ]
\ No newline at end of file
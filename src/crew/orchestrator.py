@@ -1,18 +1,90 @@
 import asyncio
+import itertools
+import sys
 import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 from src.agents.code_analyzer_agent import CodeAnalyzerAgent
+from src.config import ANALYSIS_WRITE_BEHIND, ANALYSIS_JOB_LIMIT, ANALYSIS_JOB_TTL_SECONDS
+from src.database.database import async_session_maker
 from src.models.analysis import AnalysisResponse, AnalysisMetrics, CrewTaskResult, AgentStatus
-from src.services.analysis_service import AnalysisService
+from src.services.analysis_service import AnalysisService, AnalysisWriteBuffer
 from src.tools.crew import CrewTool
 
 logger = logging.getLogger(__name__)
 
+# Process-wide sequence that keeps task IDs unique within the same nanosecond
+_task_counter = itertools.count()
+
+# Last timestamp produced by _now_iso and the wall-clock second it was built for
+_last_iso_second = -1
+_last_iso = ""
+
+
+def _now_iso() -> str:
+    """Current local time as an ISO string, at one-second resolution"""
+    global _last_iso_second, _last_iso
+
+    # Agent metadata is stamped several times per request; reuse the string
+    # built earlier in the same second instead of formatting a new one
+    second = int(time.time())
+    if second != _last_iso_second:
+        _last_iso = datetime.fromtimestamp(second).isoformat()
+        _last_iso_second = second
+    return _last_iso
+
+
+# Task and job status values
+_QUEUED = "queued"
+_RUNNING = "running"
+_COMPLETED = "completed"
+_FAILED = "failed"
+
+# orchestrate_analysis reports errors in the response summary instead of raising
+_FAILURE_SUMMARY = "Analysis failed: "
+
+# Base confidence score for a suggestion, by severity
+SEVERITY_CONFIDENCE = {
+    "critical": 0.95,
+    "high": 0.85,
+    "medium": 0.75,
+    "low": 0.65
+}
+
+
+def _copy_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy a workflow context or task result before handing it to an agent
+
+    Agents enrich suggestions in place, so the suggestion dicts are copied
+    along with the mapping; like the analyzer's cached results, suggestions
+    and metrics are flat dicts of immutable values.
+    """
+    copied = dict(context)
+
+    suggestions = copied.get("suggestions")
+    if isinstance(suggestions, list):
+        copied["suggestions"] = [
+            dict(suggestion) if isinstance(suggestion, dict) else suggestion
+            for suggestion in suggestions
+        ]
+
+    metrics = copied.get("metrics")
+    if isinstance(metrics, dict):
+        copied["metrics"] = dict(metrics)
+
+    return copied
+
+
+def _copy_task_dict(task_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a recorded task dict, including the suggestions in its result"""
+    return {**task_dict, "result": _copy_context(task_dict["result"])}
+
 
 class CrewOrchestrator:
     """
@@ -31,8 +103,31 @@ class CrewOrchestrator:
         # Initialize agents based on configuration
         self.agents = self._initialize_agents()
         self.analysis_service = AnalysisService()
+        # Batches history inserts when write-behind saving is enabled
+        self.history_writer: Optional[AnalysisWriteBuffer] = (
+            AnalysisWriteBuffer(self.analysis_service) if ANALYSIS_WRITE_BEHIND else None
+        )
         self.start_time = datetime.now()
         self.task_history: List[CrewTaskResult] = []
+        # Task results never change once recorded, so their dicts are built once
+        self._task_dicts: Dict[str, Dict[str, Any]] = {}
+        self._configuration_info: Optional[Dict[str, Any]] = None
+
+        # Task handlers keyed by the agent that runs them
+        self._task_handlers = {
+            "analisador_codigo": self._run_analysis_task,
+            "processador_resposta": self._run_response_task,
+            "gravar_dados": self._run_save_task
+        }
+
+        # Background analysis jobs, keyed by job ID in submission order
+        self.analysis_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._job_tasks: set = set()
+
+        # Queued jobs beyond this limit wait for a free slot instead of all
+        # competing for the event loop and database at once
+        max_parallel_jobs = self.tasks_config.get("execution_config", {}).get("max_parallel_tasks", 3)
+        self._job_slots = asyncio.Semaphore(max_parallel_jobs)
 
         logger.info(f"CrewOrchestrator initialized with {len(self.agents)} agents")
         logger.info(f"Available workflows: {list(self.tasks_config.get('workflows', {}).keys())}")
@@ -42,27 +137,15 @@ class CrewOrchestrator:
         agents = {}
 
         for agent_name, agent_config in self.agents_config.get("agents", {}).items():
+            agent_class = AVAILABLE_AGENTS.get(agent_name)
+            if agent_class is None:
+                continue
+
             try:
-                if agent_name == "analisador_codigo":
-                    # Create code analyzer with config
-                    agent = CodeAnalyzerAgent()
-                    agent.config = agent_config
-                    agents[agent_name] = agent
-                    logger.info(f"Initialized agent: {agent_config['name']}")
-
-                elif agent_name == "processador_resposta":
-                    # Create response processor with config
-                    agent = ResponseAgent()
-                    agent.config = agent_config
-                    agents[agent_name] = agent
-                    logger.info(f"Initialized agent: {agent_config['name']}")
-
-                elif agent_name == "gravar_dados":
-                    # Create data saver with config
-                    agent = SaveAgent()
-                    agent.config = agent_config
-                    agents[agent_name] = agent
-                    logger.info(f"Initialized agent: {agent_config['name']}")
+                agent = agent_class()
+                agent.config = agent_config
+                agents[sys.intern(agent_name)] = agent
+                logger.info(f"Initialized agent: {agent_config['name']}")
 
             except Exception as e:
                 logger.error(f"Failed to initialize agent {agent_name}: {e}")
@@ -97,52 +180,39 @@ class CrewOrchestrator:
             workflow_context = {"code_snippet": code_snippet}
             task_results = []
 
-            for task_name in workflow_config["tasks"]:
-                task_config = self.tasks_config.get("tasks", {}).get(task_name)
-                if not task_config:
-                    logger.error(f"Task {task_name} not found in configuration")
-                    continue
-
-                # Execute task based on configuration
-                task_result = await self._execute_configured_task(
-                    task_name,
-                    task_config,
-                    workflow_context,
-                    db_session
-                )
+            # Tasks whose dependencies are satisfied run concurrently, one wave at a time
+            stop_workflow = False
+            for wave in self.crew_tool.build_execution_waves(workflow_config["tasks"]):
+                wave_results = await self._execute_wave(wave, workflow_context, db_session)
 
-                task_results.append(task_result)
+                for (task_name, _), task_result in zip(wave, wave_results):
+                    task_results.append(task_result)
 
-                # Update context with task results - FIXED DATA FLOW
-                if task_result["status"] == "completed":
-                    result_data = task_result.get("result", {})
+                    # Update context with task results - FIXED DATA FLOW
+                    if task_result["status"] == _COMPLETED:
+                        result_data = task_result.get("result", {})
 
-                    # Handle different types of results properly
-                    if isinstance(result_data, dict):
-                        workflow_context.update(result_data)
+                        # Handle different types of results properly
+                        if isinstance(result_data, dict):
+                            workflow_context.update(result_data)
 
-                elif workflow_config.get("failure_strategy") == "stop_on_first_failure":
-                    logger.error(f"Task {task_name} failed, stopping workflow")
-                    break
-
-            # Extract final analysis result - IMPROVED EXTRACTION
-            analysis_result = None
-            analysis_id = None
-
-            for result in task_results:
-                if result.get("status") != "completed":
-                    continue
+                    elif workflow_config.get("failure_strategy") == "stop_on_first_failure":
+                        logger.error(f"Task {task_name} failed, stopping workflow")
+                        stop_workflow = True
 
-                result_data = result.get("result", {})
-                task_name_key = result.get("task_id", "")
+                if stop_workflow:
+                    break
 
-                # Extract analysis result from the code analysis task
-                if "analise" in task_name_key or result.get("agent_name") == "analisador_codigo":
-                    analysis_result = result_data
+            # Extract final analysis result - index completed results by agent
+            completed_results = {
+                result.get("agent_name"): result.get("result", {})
+                for result in task_results
+                if result.get("status") == _COMPLETED
+            }
 
-                # Extract analysis ID from save task
-                elif "persistencia" in task_name_key or result.get("agent_name") == "gravar_dados":
-                    analysis_id = result_data.get("analysis_id")
+            # Analysis result comes from the code analysis agent, the ID from the save agent
+            analysis_result = completed_results.get("analisador_codigo")
+            analysis_id = completed_results.get("gravar_dados", {}).get("analysis_id")
 
             if not analysis_result:
                 # Fallback: try to find any result with suggestions
@@ -209,9 +279,158 @@ class CrewOrchestrator:
                 processing_time_ms=int((time.time() - start_time) * 1000),
                 timestamp=datetime.now(),
                 agent_version="1.0.0",
-                summary=f"Analysis failed: {str(e)}"
+                summary=f"{_FAILURE_SUMMARY}{str(e)}"
             )
 
+    def submit_analysis(self, code_snippet: str) -> str:
+        """
+        Queue an analysis to run in the background and return its job ID
+        """
+        self._evict_finished_jobs()
+
+        job_id = str(uuid.uuid4())
+        self.analysis_jobs[job_id] = {
+            "task_id": job_id,
+            "status": _QUEUED,
+            "created_at": datetime.now(),
+            "completed_at": None,
+            "result": None,
+            "error": None
+        }
+
+        # Keep a reference so the task is not garbage collected while running
+        task = asyncio.create_task(self._run_analysis_job(job_id, code_snippet))
+        self._job_tasks.add(task)
+        task.add_done_callback(self._job_tasks.discard)
+
+        logger.info(f"Analysis job queued - Job ID: {job_id}")
+        return job_id
+
+    def _evict_finished_jobs(self) -> None:
+        """Drop finished jobs past their TTL, then the oldest beyond the job limit"""
+        expired_before = datetime.now() - timedelta(seconds=ANALYSIS_JOB_TTL_SECONDS)
+        # Leave room for the job about to be submitted
+        excess = len(self.analysis_jobs) + 1 - ANALYSIS_JOB_LIMIT
+
+        # Queued and running jobs are kept; their tasks still update them
+        for job_id, job in list(self.analysis_jobs.items()):
+            completed_at = job["completed_at"]
+            if completed_at is None:
+                continue
+            if excess > 0 or completed_at < expired_before:
+                del self.analysis_jobs[job_id]
+                excess -= 1
+
+    async def _run_analysis_job(self, job_id: str, code_snippet: str) -> None:
+        """Run a queued analysis with its own database session"""
+        job = self.analysis_jobs[job_id]
+
+        async with self._job_slots:
+            job["status"] = _RUNNING
+
+            try:
+                async with async_session_maker() as db_session:
+                    result = await self.orchestrate_analysis(code_snippet, db_session)
+                job["result"] = result
+
+                if result is None:
+                    job["status"] = _FAILED
+                    job["error"] = "No analysis result"
+                elif result.summary.startswith(_FAILURE_SUMMARY):
+                    job["status"] = _FAILED
+                    job["error"] = result.summary
+                else:
+                    job["status"] = _COMPLETED
+
+            except Exception as e:
+                logger.error(f"Error in analysis job {job_id}: {e}")
+                job["status"] = _FAILED
+                job["error"] = str(e)
+
+        job["completed_at"] = datetime.now()
+
+    def get_analysis_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the status and result of a background analysis job"""
+        return self.analysis_jobs.get(job_id)
+
+    async def _run_analysis_task(
+            self,
+            agent: CodeAnalyzerAgent,
+            context: Dict[str, Any],
+            db_session: AsyncSession = None
+    ) -> Dict[str, Any]:
+        """Analyze the workflow's code snippet"""
+        return await agent.analyze_code(context["code_snippet"])
+
+    async def _run_response_task(
+            self,
+            agent: "ResponseAgent",
+            context: Dict[str, Any],
+            db_session: AsyncSession = None
+    ) -> Dict[str, Any]:
+        """Enrich the analysis result held in the workflow context"""
+        # If context has suggestions as a list, wrap it properly
+        if "suggestions" in context and isinstance(context["suggestions"], list):
+            # Create a proper structure for response processing
+            analysis_result = {
+                "suggestions": context["suggestions"],
+                "metrics": context.get("metrics", {}),
+                "summary": context.get("summary", ""),
+                "processing_time_ms": context.get("processing_time_ms", 0)
+            }
+        else:
+            analysis_result = context.copy()
+
+        return await agent.process_response(analysis_result)
+
+    async def _run_save_task(
+            self,
+            agent: "SaveAgent",
+            context: Dict[str, Any],
+            db_session: AsyncSession = None
+    ) -> Dict[str, Any]:
+        """Save the analysis held in the workflow context to the database"""
+        return await agent.save_analysis(
+            context["code_snippet"],
+            context,
+            context.get("processing_time_ms", 0),
+            db_session,
+            self.analysis_service,
+            self.history_writer
+        )
+
+    async def _execute_wave(
+            self,
+            wave: List[Tuple[str, Dict[str, Any]]],
+            context: Dict[str, Any],
+            db_session: AsyncSession = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute one wave of tasks and return their results in wave order
+
+        A task running alone uses the workflow's session and context. Tasks
+        running together each get their own session, since an AsyncSession
+        does not support concurrent operations, and a copy of the context.
+        """
+        if len(wave) == 1:
+            task_name, task_config = wave[0]
+            return [await self._execute_configured_task(task_name, task_config, context, db_session)]
+
+        return await asyncio.gather(*(
+            self._execute_isolated_task(task_name, task_config, context)
+            for task_name, task_config in wave
+        ))
+
+    async def _execute_isolated_task(
+            self,
+            task_name: str,
+            task_config: Dict[str, Any],
+            context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Execute a task with its own database session and context copy"""
+        async with async_session_maker() as db_session:
+            return await self._execute_configured_task(task_name, task_config, _copy_context(context), db_session)
+
     async def _execute_configured_task(
             self,
             task_name: str,
@@ -221,7 +440,7 @@ class CrewOrchestrator:
     ) -> CrewTaskResult:
         """Execute a task based on its YAML configuration"""
         start_time = time.time()
-        task_id = f"{task_name}_{uuid.uuid4().hex[:8]}"
+        task_id = f"{task_name}_{time.time_ns():x}_{next(_task_counter)}"
 
         try:
             logger.info(f"Executing configured task: {task_config['name']}")
@@ -233,41 +452,10 @@ class CrewOrchestrator:
             if not agent:
                 raise ValueError(f"Agent {agent_name} not found")
 
-            # Execute task based on agent type
-            result = None
-
-            if agent_name == "analisador_codigo":
-                result = await agent.analyze_code(context["code_snippet"])
-
-            elif agent_name == "processador_resposta":
-                # Get analysis result from context - fix the data structure issue
-                analysis_data = context.copy()
-
-                # If context has suggestions as a list, wrap it properly
-                if "suggestions" in analysis_data and isinstance(analysis_data["suggestions"], list):
-                    # Create a proper structure for response processing
-                    analysis_result = {
-                        "suggestions": analysis_data["suggestions"],
-                        "metrics": analysis_data.get("metrics", {}),
-                        "summary": analysis_data.get("summary", ""),
-                        "processing_time_ms": analysis_data.get("processing_time_ms", 0)
-                    }
-                else:
-                    analysis_result = analysis_data
-
-                result = await agent.process_response(analysis_result)
-
-            elif agent_name == "gravar_dados":
-                # Save analysis to database
-                processing_time = context.get("processing_time_ms", 0)
-                result = await agent.save_analysis(
-                    context["code_snippet"],
-                    context,
-                    processing_time,
-                    db_session,
-                    self.analysis_service
-                )
-
+            # Execute task with the handler registered for the agent type
+            handler = self._task_handlers.get(agent_name)
+            if handler:
+                result = await handler(agent, context, db_session)
             else:
                 result = {"message": f"Task {task_name} executed", "agent": agent_name}
 
@@ -276,14 +464,13 @@ class CrewOrchestrator:
             task_result = CrewTaskResult(
                 task_id=task_id,
                 agent_name=agent_name,
-                status="completed",
+                status=_COMPLETED,
                 result=result if isinstance(result, dict) else {"data": result},
                 execution_time=execution_time
             )
 
-            self.task_history.append(task_result)
             logger.info(f"Task {task_name} completed in {execution_time:.2f}s")
-            return task_result.dict()
+            return self._record_task(task_result)
 
         except Exception as e:
             logger.error(f"Error in task {task_name}: {e}")
@@ -292,13 +479,24 @@ class CrewOrchestrator:
             task_result = CrewTaskResult(
                 task_id=task_id,
                 agent_name=task_config.get("agent", "unknown"),
-                status="failed",
+                status=_FAILED,
                 result={"error": str(e)},
                 execution_time=execution_time
             )
 
-            self.task_history.append(task_result)
-            return task_result.dict()
+            return self._record_task(task_result)
+
+    def _record_task(self, task_result: CrewTaskResult) -> Dict[str, Any]:
+        """
+        Add a finished task to the history and return a copy of its dict
+
+        Each result is serialized once; callers get copies, since the
+        workflow enriches result suggestions in place.
+        """
+        task_dict = task_result.dict()
+        self.task_history.append(task_result)
+        self._task_dicts[task_result.task_id] = task_dict
+        return _copy_task_dict(task_dict)
 
     async def get_orchestrator_status(self) -> AgentStatus:
         """Get the status of the orchestrator and all agents"""
@@ -344,20 +542,23 @@ class CrewOrchestrator:
 
     def get_configuration_info(self) -> Dict[str, Any]:
         """Get information about loaded configurations"""
-        return {
-            "agents_config": {
-                "loaded": len(self.agents_config.get("agents", {})) > 0,
-                "agents_count": len(self.agents_config.get("agents", {})),
-                "agents": list(self.agents_config.get("agents", {}).keys())
-            },
-            "tasks_config": {
-                "loaded": len(self.tasks_config.get("tasks", {})) > 0,
-                "tasks_count": len(self.tasks_config.get("tasks", {})),
-                "workflows_count": len(self.tasks_config.get("workflows", {})),
-                "tasks": list(self.tasks_config.get("tasks", {}).keys()),
-                "workflows": list(self.tasks_config.get("workflows", {}).keys())
+        # Configurations are loaded once at startup, so the summary never changes
+        if self._configuration_info is None:
+            self._configuration_info = {
+                "agents_config": {
+                    "loaded": len(self.agents_config.get("agents", {})) > 0,
+                    "agents_count": len(self.agents_config.get("agents", {})),
+                    "agents": list(self.agents_config.get("agents", {}).keys())
+                },
+                "tasks_config": {
+                    "loaded": len(self.tasks_config.get("tasks", {})) > 0,
+                    "tasks_count": len(self.tasks_config.get("tasks", {})),
+                    "workflows_count": len(self.tasks_config.get("workflows", {})),
+                    "tasks": list(self.tasks_config.get("tasks", {}).keys()),
+                    "workflows": list(self.tasks_config.get("workflows", {}).keys())
+                }
             }
-        }
+        return self._configuration_info
 
     async def get_task_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent task history"""
@@ -368,7 +569,7 @@ class CrewOrchestrator:
                 reverse=True
             )[:limit]
 
-            return [task.dict() for task in recent_tasks]
+            return [_copy_task_dict(self._task_dicts[task.task_id]) for task in recent_tasks]
 
         except Exception as e:
             logger.error(f"Error getting task history: {e}")
@@ -380,6 +581,8 @@ class ResponseAgent:
     Agent responsible for processing and formatting analysis responses
     """
 
+    __slots__ = ("name", "version", "config")
+
     def __init__(self):
         self.name = "ResponseAgent"
         self.version = "1.0.0"
@@ -401,7 +604,7 @@ class ResponseAgent:
                 "agent_metadata": {
                     "processor": self.name,
                     "version": self.version,
-                    "processed_at": datetime.now().isoformat()
+                    "processed_at": _now_iso()
                 }
             }
 
@@ -423,21 +626,14 @@ class ResponseAgent:
                 "agent_metadata": {
                     "processor": self.name,
                     "version": self.version,
-                    "processed_at": datetime.now().isoformat()
+                    "processed_at": _now_iso()
                 }
             }
 
     def _calculate_confidence(self, suggestion: Dict[str, Any]) -> float:
         """Calculate confidence score for a suggestion"""
         # Simple confidence calculation based on severity and category
-        severity_weights = {
-            "critical": 0.95,
-            "high": 0.85,
-            "medium": 0.75,
-            "low": 0.65
-        }
-
-        base_confidence = severity_weights.get(
+        base_confidence = SEVERITY_CONFIDENCE.get(
             suggestion.get("severity", "low"),
             0.5
         )
@@ -454,6 +650,8 @@ class SaveAgent:
     Agent responsible for persisting analysis results
     """
 
+    __slots__ = ("name", "version", "config")
+
     def __init__(self):
         self.name = "SaveAgent"
         self.version = "1.0.0"
@@ -465,10 +663,25 @@ class SaveAgent:
             analysis_result: Dict[str, Any],
             processing_time: int,
             db_session: AsyncSession,
-            analysis_service: AnalysisService
+            analysis_service: AnalysisService,
+            history_writer: Optional[AnalysisWriteBuffer] = None
     ) -> Dict[str, Any]:
-        """Save analysis result to database"""
+        """
+        Save analysis result to database
+
+        With a history_writer the result is queued for its next batch insert
+        instead, and no analysis_id is available yet.
+        """
         try:
+            if history_writer is not None:
+                history_writer.put(code_snippet, analysis_result, processing_time)
+                return {
+                    "analysis_id": None,
+                    "queued_at": _now_iso(),
+                    "agent": self.name,
+                    "success": True
+                }
+
             logger.info("Saving analysis to database")
 
             analysis_id = await analysis_service.save_analysis(
@@ -480,7 +693,7 @@ class SaveAgent:
 
             return {
                 "analysis_id": analysis_id,
-                "saved_at": datetime.now().isoformat(),
+                "saved_at": _now_iso(),
                 "agent": self.name,
                 "success": True
             }
@@ -493,3 +706,11 @@ class SaveAgent:
                 "agent": self.name,
                 "success": False
             }
+
+
+# Agent implementations keyed by their name in agents.yaml
+AVAILABLE_AGENTS = {
+    "analisador_codigo": CodeAnalyzerAgent,
+    "processador_resposta": ResponseAgent,
+    "gravar_dados": SaveAgent
+}
@@ -6,7 +6,6 @@ Development runner script - VERSÃO CORRIGIDA para encontrar .env
 import asyncio
 import os
 import sys
-import uvicorn
 from pathlib import Path
 current_file = Path(__file__).resolve()
 project_root = current_file.parent.parent.parent
@@ -209,6 +208,8 @@ async def main():
     os.chdir(project_root)
 
     # Start the server
+    import uvicorn
+
     try:
         uvicorn.run(
             "main:app",
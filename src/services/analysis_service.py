@@ -1,15 +1,60 @@
-import json
+import asyncio
+import hashlib
 import logging
-from typing import List, Optional
+from collections import Counter
+from typing import List, Optional, Tuple
 from datetime import datetime
+import orjson
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, func, desc, tuple_, case
+from sqlalchemy.dialects.postgresql import insert
 
-from src.database.database import AnalysisHistory
+from src.config import WRITE_BEHIND_BATCH_SIZE, WRITE_BEHIND_FLUSH_MS
+from src.database.database import AnalysisHistory, get_raw_connection
 from src.models.analysis import AnalysisHistoryItem, AnalysisResponse
 
 logger = logging.getLogger(__name__)
 
+# Columns written by bulk saves, in COPY record order
+BULK_SAVE_COLUMNS = [
+    "code_snippet", "snippet_hash", "suggestions", "suggestions_count",
+    "summary", "created_at", "processing_time", "agent_version"
+]
+
+BULK_SAVE_STAGING_SQL = """
+    CREATE TEMP TABLE analysis_history_staging (
+        code_snippet TEXT,
+        snippet_hash BYTEA,
+        suggestions TEXT,
+        suggestions_count INTEGER,
+        summary TEXT,
+        created_at TIMESTAMP,
+        processing_time INTEGER,
+        agent_version VARCHAR(50)
+    ) ON COMMIT DROP
+"""
+
+# Staged rows are merged with the same snippet_hash upsert as save_analysis;
+# DISTINCT ON keeps one row per digest so a batch never updates a row twice
+BULK_SAVE_MERGE_SQL = """
+    INSERT INTO analysis_history (
+        code_snippet, snippet_hash, suggestions, suggestions_count,
+        summary, created_at, processing_time, agent_version
+    )
+    SELECT DISTINCT ON (snippet_hash)
+        code_snippet, snippet_hash, suggestions, suggestions_count,
+        summary, created_at, processing_time, agent_version
+    FROM analysis_history_staging
+    ORDER BY snippet_hash, created_at DESC
+    ON CONFLICT (snippet_hash) DO UPDATE SET
+        suggestions = EXCLUDED.suggestions,
+        suggestions_count = EXCLUDED.suggestions_count,
+        summary = EXCLUDED.summary,
+        created_at = EXCLUDED.created_at,
+        processing_time = EXCLUDED.processing_time,
+        agent_version = EXCLUDED.agent_version
+"""
+
 class AnalysisService:
     """
     Service layer for managing code analysis operations
@@ -33,62 +78,161 @@ class AnalysisService:
         """
         try:
             # Convert suggestions to JSON string
-            suggestions_json = json.dumps(analysis_result.get('suggestions', []))
+            suggestions = analysis_result.get('suggestions', [])
+            suggestions_json = orjson.dumps(suggestions).decode()
             
-            # Create new analysis record
-            analysis_record = AnalysisHistory(
+            # Upsert on the snippet digest so identical code keeps a single row
+            insert_stmt = insert(AnalysisHistory).values(
                 code_snippet=code_snippet,
+                snippet_hash=hashlib.blake2b(code_snippet.encode(), digest_size=16).digest(),
                 suggestions=suggestions_json,
+                suggestions_count=len(suggestions),
+                summary=self._create_summary(suggestions, code_snippet),
                 created_at=datetime.utcnow(),
                 processing_time=processing_time,
                 agent_version="1.0.0"
             )
+            upsert_stmt = insert_stmt.on_conflict_do_update(
+                index_elements=[AnalysisHistory.snippet_hash],
+                set_={
+                    "suggestions": insert_stmt.excluded.suggestions,
+                    "suggestions_count": insert_stmt.excluded.suggestions_count,
+                    "summary": insert_stmt.excluded.summary,
+                    "created_at": insert_stmt.excluded.created_at,
+                    "processing_time": insert_stmt.excluded.processing_time,
+                    "agent_version": insert_stmt.excluded.agent_version
+                }
+            ).returning(AnalysisHistory.id)
             
-            db_session.add(analysis_record)
+            result = await db_session.execute(upsert_stmt)
+            analysis_id = result.scalar_one()
             await db_session.commit()
-            await db_session.refresh(analysis_record)
             
-            self.logger.info(f"Analysis saved with ID: {analysis_record.id}")
-            return analysis_record.id
+            self.logger.info(f"Analysis saved with ID: {analysis_id}")
+            return analysis_id
             
         except Exception as e:
             await db_session.rollback()
             self.logger.error(f"Error saving analysis: {e}")
             raise
     
+    async def save_analyses_bulk(
+        self,
+        records: List[Tuple[str, dict, int]]
+    ) -> int:
+        """
+        Save many analysis results in one round trip using the COPY protocol
+        
+        Args:
+            records: (code_snippet, analysis_result, processing_time) tuples
+        
+        Returns:
+            int: Number of rows inserted or updated
+        """
+        if not records:
+            return 0
+        
+        created_at = datetime.utcnow()
+        rows = []
+        for code_snippet, analysis_result, processing_time in records:
+            suggestions = analysis_result.get('suggestions', [])
+            rows.append((
+                code_snippet,
+                hashlib.blake2b(code_snippet.encode(), digest_size=16).digest(),
+                orjson.dumps(suggestions).decode(),
+                len(suggestions),
+                self._create_summary(suggestions, code_snippet),
+                created_at,
+                processing_time,
+                "1.0.0"
+            ))
+        
+        try:
+            async with get_raw_connection() as conn:
+                async with conn.transaction():
+                    await conn.execute(BULK_SAVE_STAGING_SQL)
+                    await conn.copy_records_to_table(
+                        "analysis_history_staging",
+                        records=rows,
+                        columns=BULK_SAVE_COLUMNS
+                    )
+                    status = await conn.execute(BULK_SAVE_MERGE_SQL)
+            
+            saved_count = int(status.split()[-1])
+            self.logger.info(f"Bulk saved {saved_count} analyses")
+            return saved_count
+            
+        except Exception as e:
+            self.logger.error(f"Error bulk saving analyses: {e}")
+            raise
+    
     async def get_analysis_history(
         self,
         db_session: AsyncSession,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        cursor_created_at: Optional[datetime] = None,
+        cursor_id: Optional[int] = None
     ) -> List[AnalysisHistoryItem]:
         """
         Get analysis history with pagination
+        
+        When a (cursor_created_at, cursor_id) pair from a previous page is given,
+        rows are fetched with an index range scan starting after that position
+        instead of scanning and discarding `offset` rows.
         """
         try:
-            # Query for analysis history
+            # Query only the listed columns; the snippet is truncated in SQL so
+            # full code bodies never cross the wire for a history page
             stmt = (
-                select(AnalysisHistory)
-                .order_by(desc(AnalysisHistory.created_at))
+                select(
+                    AnalysisHistory.id,
+                    func.substr(AnalysisHistory.code_snippet, 1, 200).label("snippet_preview"),
+                    func.length(AnalysisHistory.code_snippet).label("snippet_length"),
+                    AnalysisHistory.suggestions_count,
+                    AnalysisHistory.summary,
+                    # Rows saved before the count was stored still need decoding
+                    case(
+                        (AnalysisHistory.suggestions_count.is_(None), AnalysisHistory.suggestions),
+                        else_=None
+                    ).label("legacy_suggestions"),
+                    AnalysisHistory.created_at,
+                    AnalysisHistory.processing_time
+                )
+                .order_by(desc(AnalysisHistory.created_at), desc(AnalysisHistory.id))
                 .limit(limit)
-                .offset(offset)
             )
             
+            if cursor_created_at is not None and cursor_id is not None:
+                stmt = stmt.where(
+                    tuple_(AnalysisHistory.created_at, AnalysisHistory.id)
+                    < tuple_(cursor_created_at, cursor_id)
+                )
+            elif cursor_created_at is None and cursor_id is None:
+                # Deprecated: offset pagination cost grows with page depth
+                stmt = stmt.offset(offset)
+            else:
+                raise ValueError("cursor_created_at and cursor_id must be given together")
+            
             result = await db_session.execute(stmt)
-            analyses = result.scalars().all()
+            analyses = result.all()
             
-            # Convert to response models
+            # Convert to response models; rows are already typed by the driver,
+            # so the items are built without re-running validation
             history_items = []
             for analysis in analyses:
-                suggestions = json.loads(analysis.suggestions) if analysis.suggestions else []
+                suggestions_count = analysis.suggestions_count
+                summary = analysis.summary
                 
-                # Create summary from suggestions
-                summary = self._create_summary(suggestions, analysis.code_snippet)
+                if suggestions_count is None:
+                    suggestions = orjson.loads(analysis.legacy_suggestions) if analysis.legacy_suggestions else []
+                    suggestions_count = len(suggestions)
+                    summary = self._create_summary(suggestions, analysis.snippet_preview)
                 
-                history_items.append(AnalysisHistoryItem(
+                history_items.append(AnalysisHistoryItem.construct(
                     id=analysis.id,
-                    code_snippet=analysis.code_snippet[:200] + "..." if len(analysis.code_snippet) > 200 else analysis.code_snippet,
-                    suggestions_count=len(suggestions),
+                    code_snippet=analysis.snippet_preview + "..." if analysis.snippet_length > 200 else analysis.snippet_preview,
+                    suggestions_count=suggestions_count,
                     created_at=analysis.created_at,
                     processing_time=analysis.processing_time,
                     summary=summary
@@ -103,10 +247,14 @@ class AnalysisService:
     async def get_analysis_by_id(
         self,
         db_session: AsyncSession,
-        analysis_id: int
+        analysis_id: int,
+        decode_suggestions: bool = True
     ) -> Optional[dict]:
         """
         Get specific analysis by ID
+        
+        With decode_suggestions=False the suggestions are returned as the
+        stored JSON text, for callers that pass them straight to a response.
         """
         try:
             stmt = select(AnalysisHistory).where(AnalysisHistory.id == analysis_id)
@@ -117,7 +265,10 @@ class AnalysisService:
                 return None
             
             # Parse suggestions from JSON
-            suggestions = json.loads(analysis.suggestions) if analysis.suggestions else []
+            if decode_suggestions:
+                suggestions = orjson.loads(analysis.suggestions) if analysis.suggestions else []
+            else:
+                suggestions = analysis.suggestions or "[]"
             
             return {
                 "id": analysis.id,
@@ -140,24 +291,15 @@ class AnalysisService:
         Get statistics about analyses performed
         """
         try:
-            # Total analyses
-            total_stmt = select(func.count(AnalysisHistory.id))
-            total_result = await db_session.execute(total_stmt)
-            total_analyses = total_result.scalar()
-            
-            # Average processing time
-            avg_time_stmt = select(func.avg(AnalysisHistory.processing_time))
-            avg_time_result = await db_session.execute(avg_time_stmt)
-            avg_processing_time = avg_time_result.scalar() or 0
-            
-            # Last analysis timestamp
-            last_analysis_stmt = (
-                select(AnalysisHistory.created_at)
-                .order_by(desc(AnalysisHistory.created_at))
-                .limit(1)
+            # Count, average processing time and last timestamp in one round trip
+            stats_stmt = select(
+                func.count(AnalysisHistory.id),
+                func.avg(AnalysisHistory.processing_time),
+                func.max(AnalysisHistory.created_at)
             )
-            last_analysis_result = await db_session.execute(last_analysis_stmt)
-            last_analysis = last_analysis_result.scalar()
+            stats_result = await db_session.execute(stats_stmt)
+            total_analyses, avg_processing_time, last_analysis = stats_result.one()
+            avg_processing_time = avg_processing_time or 0
             
             return {
                 "total_analyses": total_analyses,
@@ -216,24 +358,90 @@ class AnalysisService:
         if not suggestions:
             return "No issues found"
         
-        # Count by severity
-        severity_counts = {}
-        for suggestion in suggestions:
-            severity = suggestion.get('severity', 'unknown')
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+        # Count by severity in a single pass
+        severity_counts = Counter(
+            suggestion.get('severity', 'unknown') for suggestion in suggestions
+        )
         
         # Create summary
-        summary_parts = []
-        if severity_counts.get('critical', 0) > 0:
-            summary_parts.append(f"{severity_counts['critical']} critical")
-        if severity_counts.get('high', 0) > 0:
-            summary_parts.append(f"{severity_counts['high']} high")
-        if severity_counts.get('medium', 0) > 0:
-            summary_parts.append(f"{severity_counts['medium']} medium")
-        if severity_counts.get('low', 0) > 0:
-            summary_parts.append(f"{severity_counts['low']} low")
+        summary_parts = [
+            f"{severity_counts[severity]} {severity}"
+            for severity in ('critical', 'high', 'medium', 'low')
+            if severity_counts[severity]
+        ]
         
         if summary_parts:
             return f"Found issues: {', '.join(summary_parts)}"
         else:
-            return f"{len(suggestions)} suggestions found"
\ No newline at end of file
+            return f"{len(suggestions)} suggestions found"
+
+
+class AnalysisWriteBuffer:
+    """
+    Queues analysis results and saves them in batches with save_analyses_bulk
+    
+    A batch is flushed once it holds batch_size records or flush_interval
+    seconds after its first record arrived, whichever comes first.
+    """
+    
+    def __init__(
+        self,
+        analysis_service: AnalysisService,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        flush_interval: float = WRITE_BEHIND_FLUSH_MS / 1000
+    ):
+        self.analysis_service = analysis_service
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__)
+        self._queue: "asyncio.Queue[Optional[Tuple[str, dict, int]]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+    
+    def put(self, code_snippet: str, analysis_result: dict, processing_time: int) -> None:
+        """Queue an analysis result for the next batch"""
+        self._queue.put_nowait((code_snippet, analysis_result, processing_time))
+    
+    def start(self) -> None:
+        """Start the background flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the flush loop"""
+        if self._task is None:
+            return
+        
+        # The sentinel is queued behind pending records, so they are saved first
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            record = await self._queue.get()
+            if record is None:
+                break
+            
+            batch = [record]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            
+            try:
+                await self.analysis_service.save_analyses_bulk(batch)
+            except Exception as e:
+                # Keep flushing later batches; this one has been logged as lost
+                self.logger.error(f"Error flushing {len(batch)} queued analyses: {e}")
@@ -3,7 +3,15 @@ Tools package for Code Analysis Agents
 Contains specialized tools used by different agents
 """
 
-from .custom_tool import CustomAnalysisTool
-from .crew import CrewTool
+__all__ = ["CustomAnalysisTool", "CrewTool"]
 
-__all__ = ["CustomAnalysisTool", "CrewTool"]
\ No newline at end of file
+
+def __getattr__(name):
+    # Import tools on first use, so loading one tool module does not pull in the others
+    if name == "CustomAnalysisTool":
+        from .custom_tool import CustomAnalysisTool
+        return CustomAnalysisTool
+    if name == "CrewTool":
+        from .crew import CrewTool
+        return CrewTool
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
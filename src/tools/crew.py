@@ -4,8 +4,9 @@ CrewAI integration tools and utilities
 
 import yaml
 import os
+import sys
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import logging
 
@@ -22,8 +23,29 @@ class CrewTool:
         self.version = "1.0.0"
         self.config_path = Path(__file__).parent.parent / "config"
 
+        # Parsed YAML configurations, loaded once and reused by every lookup
+        self._agents_config: Optional[Dict[str, Any]] = None
+        self._tasks_config: Optional[Dict[str, Any]] = None
+
     def load_agents_config(self) -> Dict[str, Any]:
-        """Load agents configuration from YAML file"""
+        """Load agents configuration from YAML file (cached after the first load)"""
+        if self._agents_config is None:
+            self._agents_config = self._read_agents_config()
+        return self._agents_config
+
+    def load_tasks_config(self) -> Dict[str, Any]:
+        """Load tasks configuration from YAML file (cached after the first load)"""
+        if self._tasks_config is None:
+            self._tasks_config = self._read_tasks_config()
+        return self._tasks_config
+
+    def clear_config_cache(self) -> None:
+        """Drop cached configurations so the next load re-reads the YAML files"""
+        self._agents_config = None
+        self._tasks_config = None
+
+    def _read_agents_config(self) -> Dict[str, Any]:
+        """Read agents configuration from YAML file"""
         # Try multiple possible paths
         possible_paths = [
             self.config_path / "agents.yaml",
@@ -50,8 +72,8 @@ class CrewTool:
             logger.error(f"Error parsing agents config: {e}")
             return self._get_default_agents_config()
 
-    def load_tasks_config(self) -> Dict[str, Any]:
-        """Load tasks configuration from YAML file"""
+    def _read_tasks_config(self) -> Dict[str, Any]:
+        """Read tasks configuration from YAML file"""
         # Try multiple possible paths
         possible_paths = [
             self.config_path / "tasks.yaml",
@@ -73,6 +95,11 @@ class CrewTool:
             with open(config_file, 'r', encoding='utf-8') as file:
                 config = yaml.safe_load(file)
                 logger.info(f"Tasks configuration loaded from: {config_file}")
+                # Agent names key the orchestrator's agent and handler dicts; interning
+                # them lets every task lookup match those keys by identity
+                for task_config in (config or {}).get("tasks", {}).values():
+                    if isinstance(task_config.get("agent"), str):
+                        task_config["agent"] = sys.intern(task_config["agent"])
                 return config
         except yaml.YAMLError as e:
             logger.error(f"Error parsing tasks config: {e}")
@@ -82,12 +109,11 @@ class CrewTool:
         """Validate agent configuration"""
         required_fields = ['name', 'role', 'goal', 'backstory']
 
-        if agent_name not in config.get('agents', {}):
+        agent_config = config.get('agents', {}).get(agent_name)
+        if agent_config is None:
             logger.error(f"Agent {agent_name} not found in configuration")
             return False
 
-        agent_config = config['agents'][agent_name]
-
         for field in required_fields:
             if field not in agent_config:
                 logger.error(f"Missing required field '{field}' in agent {agent_name}")
@@ -100,12 +126,11 @@ class CrewTool:
         """Validate task configuration"""
         required_fields = ['name', 'description', 'expected_output', 'agent']
 
-        if task_name not in config.get('tasks', {}):
+        task_config = config.get('tasks', {}).get(task_name)
+        if task_config is None:
             logger.error(f"Task {task_name} not found in configuration")
             return False
 
-        task_config = config['tasks'][task_name]
-
         for field in required_fields:
             if field not in task_config:
                 logger.error(f"Missing required field '{field}' in task {task_name}")
@@ -170,6 +195,42 @@ class CrewTool:
 
         return task_instance
 
+    def build_execution_waves(self, task_names: List[str]) -> List[List[Tuple[str, Dict[str, Any]]]]:
+        """
+        Group workflow tasks into waves based on their configured dependencies
+
+        Each wave holds (task_name, task_config) pairs whose dependencies were
+        all scheduled in earlier waves. Dependencies on tasks outside the
+        workflow are ignored.
+        """
+        tasks_config = self.load_tasks_config().get("tasks", {})
+        task_configs = {}
+        for task_name in task_names:
+            task_config = tasks_config.get(task_name)
+            if not task_config:
+                logger.error(f"Task {task_name} not found in configuration")
+                continue
+            task_configs[task_name] = task_config
+
+        pending = {
+            task_name: {dep for dep in task_config.get("dependencies", []) if dep in task_configs}
+            for task_name, task_config in task_configs.items()
+        }
+
+        waves = []
+        while pending:
+            ready = [task_name for task_name, deps in pending.items() if not deps]
+            if not ready:
+                raise ValueError(f"Circular task dependencies in workflow: {list(pending)}")
+
+            waves.append([(task_name, task_configs[task_name]) for task_name in ready])
+            for task_name in ready:
+                del pending[task_name]
+            for deps in pending.values():
+                deps.difference_update(ready)
+
+        return waves
+
     def execute_workflow(self, workflow_name: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Execute a workflow with the given context"""
         workflow_config = self.get_workflow_by_name(workflow_name)
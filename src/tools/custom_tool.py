@@ -5,7 +5,76 @@ Custom tools for code analysis agents
 import ast
 import re
 import hashlib
-from typing import Dict, Any, List
+from collections import OrderedDict, deque
+from typing import Dict, Any, Iterator, List
+
+# Patterns used by detect_code_patterns, compiled once at import
+_FUNCTION_PARAMS = re.compile(r'def\s+\w+\s*\((.*?)\)')
+_MAGIC_NUMBER = re.compile(r'\b(?<![\w.])\d{2,}\b(?![\w.])')
+# Any magic number needs two adjacent digits somewhere in the code
+_DIGIT_PAIR = re.compile(r'\d\d')
+
+# Parsed trees keyed by a digest of the code; every public method parses its
+# input, so one snippet run through several of them is parsed only once
+_PARSE_CACHE_SIZE = 128
+_PARSE_CACHE: "OrderedDict[bytes, ast.Module]" = OrderedDict()
+
+# Nodes that can hold statements; every other node is an expression-level
+# subtree with no functions, classes, imports or loops inside it
+_STATEMENT_NODES = (ast.stmt, ast.excepthandler, ast.match_case)
+_LOOP_NODES = (ast.For, ast.While)
+
+
+def _walk_statements(node: ast.AST) -> Iterator[ast.AST]:
+    """Yield node and every statement below it, in ast.walk order"""
+    todo = deque([node])
+    popleft = todo.popleft
+    extend = todo.extend
+    iter_child_nodes = ast.iter_child_nodes
+    while todo:
+        node = popleft()
+        extend(child for child in iter_child_nodes(node) if isinstance(child, _STATEMENT_NODES))
+        yield node
+
+
+def _count_nested_loops(tree: ast.AST) -> Dict[int, int]:
+    """
+    Count the loops nested at any depth inside each loop, keyed by id(node)
+
+    Counts are summed bottom-up in one pass instead of re-walking every
+    loop's subtree, which costs O(depth * size) for deep nesting.
+    """
+    counts = {}
+
+    def count_loops(node: ast.AST) -> int:
+        # Loops in node's subtree, node included
+        total = 0
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, _STATEMENT_NODES):
+                total += count_loops(child)
+        if isinstance(node, _LOOP_NODES):
+            counts[id(node)] = total
+            total += 1
+        return total
+
+    count_loops(tree)
+    return counts
+
+
+def _parse(code: str) -> ast.Module:
+    """Parse code, reusing the tree from an earlier call with the same code"""
+    cache_key = hashlib.blake2b(code.encode(), digest_size=16).digest()
+
+    tree = _PARSE_CACHE.get(cache_key)
+    if tree is not None:
+        _PARSE_CACHE.move_to_end(cache_key)
+        return tree
+
+    tree = ast.parse(code)
+    _PARSE_CACHE[cache_key] = tree
+    if len(_PARSE_CACHE) > _PARSE_CACHE_SIZE:
+        _PARSE_CACHE.popitem(last=False)
+    return tree
 
 
 class CustomAnalysisTool:
@@ -22,12 +91,16 @@ class CustomAnalysisTool:
         """Calculate hash of the code for caching purposes"""
         return hashlib.md5(code.encode()).hexdigest()
 
+    def clear_parse_cache(self) -> None:
+        """Drop cached syntax trees, e.g. to release memory in a long-running process"""
+        _PARSE_CACHE.clear()
+
     def extract_functions(self, code: str) -> List[Dict[str, Any]]:
         """Extract function information from code"""
         functions = []
         try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
+            tree = _parse(code)
+            for node in _walk_statements(tree):
                 if isinstance(node, ast.FunctionDef):
                     functions.append({
                         "name": node.name,
@@ -44,8 +117,8 @@ class CustomAnalysisTool:
         """Extract class information from code"""
         classes = []
         try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
+            tree = _parse(code)
+            for node in _walk_statements(tree):
                 if isinstance(node, ast.ClassDef):
                     methods = [
                         n.name for n in node.body
@@ -78,8 +151,8 @@ class CustomAnalysisTool:
         }
 
         try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
+            tree = _parse(code)
+            for node in _walk_statements(tree):
                 if isinstance(node, ast.Import):
                     for alias in node.names:
                         module_name = alias.name.split('.')[0]
@@ -104,33 +177,41 @@ class CustomAnalysisTool:
     def detect_code_patterns(self, code: str) -> List[Dict[str, Any]]:
         """Detect common code patterns and anti-patterns"""
         patterns = []
-        lines = code.split('\n')
 
         # Pattern 1: Long parameter lists
-        for i, line in enumerate(lines, 1):
-            if 'def ' in line:
-                # Count parameters (simple regex approach)
-                param_match = re.search(r'def\s+\w+\s*\((.*?)\)', line)
-                if param_match:
-                    params = [p.strip() for p in param_match.group(1).split(',') if p.strip()]
-                    if len(params) > 5:
-                        patterns.append({
-                            "pattern": "long_parameter_list",
-                            "line": i,
-                            "severity": "medium",
-                            "message": f"Function has {len(params)} parameters"
-                        })
+        # Jump between occurrences of 'def ' rather than visiting every line
+        line_number = 1
+        line_start = 0
+        position = code.find('def ')
+        while position != -1:
+            start = code.rfind('\n', 0, position) + 1
+            end = code.find('\n', position)
+            if end == -1:
+                end = len(code)
+            line_number += code.count('\n', line_start, start)
+            line_start = start
+
+            # Count parameters (simple regex approach)
+            param_match = _FUNCTION_PARAMS.search(code, start, end)
+            if param_match:
+                params = [p.strip() for p in param_match.group(1).split(',') if p.strip()]
+                if len(params) > 5:
+                    patterns.append({
+                        "pattern": "long_parameter_list",
+                        "line": line_number,
+                        "severity": "medium",
+                        "message": f"Function has {len(params)} parameters"
+                    })
+
+            position = code.find('def ', end)
 
         # Pattern 2: Nested loops
         try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
-                if isinstance(node, (ast.For, ast.While)):
-                    nested_loops = 0
-                    for child in ast.walk(node):
-                        if isinstance(child, (ast.For, ast.While)) and child != node:
-                            nested_loops += 1
-
+            tree = _parse(code)
+            nested_loop_counts = _count_nested_loops(tree)
+            for node in _walk_statements(tree):
+                if isinstance(node, _LOOP_NODES):
+                    nested_loops = nested_loop_counts[id(node)]
                     if nested_loops >= 2:
                         patterns.append({
                             "pattern": "deeply_nested_loops",
@@ -142,22 +223,29 @@ class CustomAnalysisTool:
             pass
 
         # Pattern 3: Magic numbers
-        magic_number_pattern = re.compile(r'\b(?<![\w.])\d{2,}\b(?![\w.])')
-        for i, line in enumerate(lines, 1):
-            if magic_number_pattern.search(line):
-                patterns.append({
-                    "pattern": "magic_numbers",
-                    "line": i,
-                    "severity": "low",
-                    "message": "Consider using named constants instead of magic numbers"
-                })
+        # One regex pass over the whole code, reporting each line once
+        if _DIGIT_PAIR.search(code):
+            line_number = 1
+            position = 0
+            reported_line = 0
+            for match in _MAGIC_NUMBER.finditer(code):
+                line_number += code.count('\n', position, match.start())
+                position = match.start()
+                if line_number != reported_line:
+                    reported_line = line_number
+                    patterns.append({
+                        "pattern": "magic_numbers",
+                        "line": line_number,
+                        "severity": "low",
+                        "message": "Consider using named constants instead of magic numbers"
+                    })
 
         return patterns
 
     def calculate_maintainability_score(self, code: str) -> float:
         """Calculate a maintainability score for the code"""
         try:
-            tree = ast.parse(code)
+            tree = _parse(code)
         except SyntaxError:
             return 0.0
 
@@ -189,10 +277,9 @@ class CustomAnalysisTool:
     def suggest_refactoring_opportunities(self, code: str) -> List[Dict[str, Any]]:
         """Suggest refactoring opportunities"""
         suggestions = []
-        functions = self.extract_functions(code)
 
         # Large functions (estimate by line count)
-        lines = code.split('\n')
+        lines = code.split('\n') if 'def ' in code else []
         current_function = None
         function_lines = {}
 
@@ -219,7 +306,7 @@ class CustomAnalysisTool:
     def analyze_complexity_metrics(self, code: str) -> Dict[str, Any]:
         """Analyze various complexity metrics"""
         try:
-            tree = ast.parse(code)
+            tree = _parse(code)
         except SyntaxError:
             return {"error": "Syntax error in code"}
 
@@ -238,7 +325,7 @@ class CustomAnalysisTool:
         """Calculate overall complexity score"""
         complexity = 0
 
-        for node in ast.walk(tree):
+        for node in _walk_statements(tree):
             if isinstance(node, (ast.If, ast.While, ast.For)):
                 complexity += 1
             elif isinstance(node, ast.FunctionDef):
@@ -0,0 +1,12 @@
+from src.agents.code_analyzer_agent import CodeAnalyzerAgent
+
+
+def test_long_operator_chain_is_analyzed():
+    # A chained BinOp nests one level per term; the traversal must not recurse
+    code = "def f():\n    x = " + " + ".join(["a"] * 1000)
+    
+    result = CodeAnalyzerAgent()._run_analysis(code)
+    
+    rule_names = [suggestion["rule_name"] for suggestion in result["suggestions"]]
+    assert "analysis_error" not in rule_names
+    assert "missing_docstring" in rule_names
@@ -0,0 +1,64 @@
+import pytest
+
+from src.crew import orchestrator as orchestrator_module
+from src.crew.orchestrator import CrewOrchestrator
+
+
+class _FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_wave_tasks_do_not_share_context(monkeypatch):
+    sessions = []
+
+    def session_maker():
+        session = _FakeSession()
+        sessions.append(session)
+        return session
+
+    monkeypatch.setattr(orchestrator_module, "async_session_maker", session_maker)
+
+    crew_orchestrator = CrewOrchestrator()
+    suggestion = {"severity": "high", "line_number": 1, "message": "Long line"}
+    context = {"code_snippet": "x = 1", "suggestions": [suggestion], "metrics": {"lines_of_code": 1}}
+    task_config = {"name": "Processamento de Resposta", "agent": "processador_resposta"}
+
+    results = await crew_orchestrator._execute_wave(
+        [("primeira", task_config), ("segunda", task_config)],
+        context
+    )
+
+    # Each task ran in its own session
+    assert len(sessions) == 2
+    assert len({id(session) for session in sessions}) == 2
+
+    # Enrichment happened on per-task copies, never on the shared context
+    assert "id" not in suggestion
+    first, second = (result["result"]["suggestions"][0] for result in results)
+    assert first is not second
+    assert first["id"] != second["id"]
+
+
+def test_recorded_task_dicts_are_handed_out_as_copies():
+    crew_orchestrator = CrewOrchestrator()
+    task_result = orchestrator_module.CrewTaskResult(
+        task_id="tarefa_1",
+        agent_name="analisador_codigo",
+        status="completed",
+        result={"suggestions": [{"severity": "low", "message": "Long line"}]},
+        execution_time=0.1
+    )
+
+    returned = crew_orchestrator._record_task(task_result)
+    returned["result"]["suggestions"][0]["id"] = "changed"
+
+    history = crew_orchestrator.get_task_history()
+    assert "id" not in history[0]["result"]["suggestions"][0]
+
+    history[0]["status"] = "changed"
+    assert crew_orchestrator.get_task_history()[0]["status"] == "completed"